@@ -17,3 +17,33 @@ POOLS_CACHE_FILE = "data/pools_cache.json"
 TOKEN_METADATA_FILE = "data/token_metadata.json"
 
 
+
+# Logging
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "json"  # "json" para logs estructurados, "text" para el formato clásico
+# Tasa de muestreo por tipo de mensaje del bucle caliente (1.0 = todos, 0.05 = 1 de cada 20, 0 = ninguno)
+LOG_SAMPLE_RATES = {
+    "pool_scan": 0.05,
+}
+
+# Snapshot de oportunidades compartido con el dashboard (archivo mapeado en memoria)
+# En Linux puede apuntarse a /dev/shm para evitar que el kernel lo sincronice a disco.
+OPPORTUNITY_SNAPSHOT_FILE = "data/opportunities.snapshot"
+OPPORTUNITY_SNAPSHOT_CAPACITY_BYTES = 4 * 1024 * 1024
+DASHBOARD_AUTOSTART = True  # Lanzar el dashboard como proceso separado al iniciar el bot
+
+# Revalidación rápida de las mejores oportunidades entre ciclos completos
+REVALIDATION_INTERVAL = 5        # Segundos entre pasadas de revalidación
+REVALIDATION_TOP_K = 10          # Número de oportunidades (por ganancia) que se re-simulan en cada pasada
+OPPORTUNITY_TTL_SECONDS = 20     # Edad máxima del input más antiguo antes de expirar una oportunidad
+QUOTE_CACHE_TTL_SECONDS = 2      # Reutilización de cotizaciones de Jupiter (incluidas las precalentadas)
+
+# Detección de pools nuevas on-chain (programa DAMM v2 / cp-amm de Meteora)
+DAMM_V2_PROGRAM_ID = "cpamdpZCGKUy5JxQXB4dcpGPiikHawvSWAd6mEn1sGG"
+NEW_POOL_COMMITMENT = "confirmed"  # "confirmed" permite evaluar la pool a los pocos slots de su creación
+
+# Perfilador de ciclos bajo demanda (se arma desde el dashboard)
+PROFILER_DIR = "data/profiles"
+PROFILER_MAX_CAPTURES = 20       # Capturas conservadas; las más antiguas se borran
+PROFILER_MAX_CYCLES = 10         # Máximo de ciclos por petición
+PROFILER_SAMPLE_INTERVAL = 0.005 # Segundos entre muestras en modo "sampling"
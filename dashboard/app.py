@@ -1,17 +1,15 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, request, Response, jsonify
 import sys
 import os
-import time
 
 # Add the parent directory to the sys.path to allow imports from src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 
                                                 os.pardir)))
 
-# Import the shared ArbitrageFinder instance from main.py
-from src.main import shared_arbitrage_finder
+# The scanner publishes opportunities to a memory-mapped snapshot; the dashboard runs in its own process
+from src.utils.snapshot import OpportunitySnapshotReader
+from src.utils.profiler import arm_profiler, list_captures, load_capture, to_collapsed, to_speedscope
 from src.utils.logger import setup_logger
-from src.utils.helpers import to_human_readable
-from config.settings import BASE_TOKENS
 
 logger = setup_logger(__name__)
 
@@ -27,34 +25,61 @@ app = Flask(__name__,
 def index():
     return render_template('index.html')
 
+# Each worker process maps the snapshot read-only on its first request
+snapshot_reader = OpportunitySnapshotReader()
+
 @app.route('/opportunities')
 def get_opportunities():
-    opportunities = shared_arbitrage_finder.get_current_opportunities()
-    
-    formatted_opportunities = []
-    for opp in opportunities:
-        formatted_opp = opp.copy()
-        
-        # Determine the base token symbol and its decimals for display
-        base_token_symbol = opp['capital'].split(' ')[1] # e.g., '0.1 SOL' -> 'SOL'
-        base_mint_address = BASE_TOKENS.get(base_token_symbol) # Get mint address from settings
-        
-        # This is a simplification. In a real scenario, you'd need to fetch decimals for any token.
-        # For now, rely on the base tokens defined in settings.
-        base_token_decimals = 9 if base_token_symbol == "SOL" else (6 if base_token_symbol == "USDC" else 0)
-
-        if 'net_profit_lamports' in formatted_opp:
-            formatted_opp['net_profit_display'] = f"{to_human_readable(formatted_opp['net_profit_lamports'], base_token_decimals):.6f} {base_token_symbol}"
-        
-        # Format timestamp for display
-        if 'timestamp' in formatted_opp and isinstance(formatted_opp['timestamp'], int):
-            formatted_opp['timestamp_display'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(formatted_opp['timestamp']))
-        else:
-            formatted_opp['timestamp_display'] = 'N/A'
-
-        formatted_opportunities.append(formatted_opp)
-
-    return jsonify(formatted_opportunities)
+    generation, published_at, payload = snapshot_reader.read()
+
+    # The payload is already serialized by the scanner; serve it as-is
+    etag = f'"{generation}"'
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers={'ETag': etag})
+
+    response = Response(payload, mimetype='application/json')
+    response.headers['ETag'] = etag
+    response.headers['X-Snapshot-Generation'] = str(generation)
+    response.headers['X-Snapshot-Published-At'] = f"{published_at:.3f}"
+    return response
+
+@app.route('/profiler/arm', methods=['POST'])
+def arm_cycle_profiler():
+    # The scanner picks the request up at the start of its next cycle
+    try:
+        cycles = int(request.args.get('cycles', 1))
+    except ValueError:
+        return jsonify({'error': 'cycles must be an integer'}), 400
+    try:
+        profile_request = arm_profiler(
+            cycles=cycles,
+            mode=request.args.get('mode', 'sampling'),
+            allocations=request.args.get('allocations', '0') in ('1', 'true'),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    logger.info("Perfilador armado desde el dashboard: %s", profile_request)
+    return jsonify(profile_request), 202
+
+@app.route('/profiler/captures')
+def get_profiler_captures():
+    return jsonify(list_captures())
+
+@app.route('/profiler/captures/<capture_id>')
+def get_profiler_capture(capture_id):
+    capture = load_capture(capture_id)
+    if capture is None:
+        return jsonify({'error': 'capture not found'}), 404
+
+    export_format = request.args.get('format', 'json')
+    if export_format == 'collapsed':
+        return Response(to_collapsed(capture), mimetype='text/plain',
+                        headers={'Content-Disposition': f'attachment; filename={capture_id}.folded'})
+    if export_format == 'speedscope':
+        response = jsonify(to_speedscope(capture))
+        response.headers['Content-Disposition'] = f'attachment; filename={capture_id}.speedscope.json'
+        return response
+    return jsonify(capture)
 
 if __name__ == '__main__':
     logger.info("Iniciando servidor del dashboard en http://0.0.0.0:5000")
@@ -31,7 +31,8 @@ document.addEventListener("DOMContentLoaded", function() {
                     row.insertCell().textContent = opportunity.sell_platform;
                     // Placeholder for Meteora Liquidity - needs to be added to opportunity object
                     row.insertCell().textContent = "N/A"; 
-                    row.insertCell().textContent = opportunity.timestamp_display; // Usar el campo formateado
+                    // Última validación y edad del input más antiguo (pool / cotización)
+                    row.insertCell().textContent = `${opportunity.timestamp_display} (${opportunity.input_age_seconds}s)`;
 
                     const actionsCell = row.insertCell();
                     actionsCell.classList.add("action-buttons");
@@ -28,7 +28,7 @@ class JupiterAPI:
             response.raise_for_status()  # Lanza una excepción para errores HTTP
             return response.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error al obtener cotización de Jupiter para {input_mint} -> {output_mint} con {amount}: {e}")
+            logger.error("Error al obtener cotización de Jupiter para %s -> %s con %s: %s", input_mint, output_mint, amount, e)
             return None
 
     def get_swap_transaction(self, quote_response, user_public_key):
@@ -54,7 +54,7 @@ class JupiterAPI:
             response.raise_for_status()  # Lanza una excepción para errores HTTP
             return response.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error al obtener transacción de swap de Jupiter: {e}")
+            logger.error("Error al obtener transacción de swap de Jupiter: %s", e)
             return None
 
 
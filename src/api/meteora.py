@@ -62,7 +62,7 @@ class MeteoraAPI:
                     page += 1
 
             except requests.exceptions.RequestException as e:
-                logger.error(f"Error al obtener pools de Meteora DAMM v2: {e}")
+                logger.error("Error al obtener pools de Meteora DAMM v2: %s", e)
                 return None
         
         return all_pools
@@ -83,7 +83,7 @@ class MeteoraAPI:
             response.raise_for_status() # Lanza una excepción para errores HTTP
             return response.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Error al obtener detalles de la pool {pool_address} de Meteora DAMM v2: {e}")
+            logger.error("Error al obtener detalles de la pool %s de Meteora DAMM v2: %s", pool_address, e)
             return None
 
 
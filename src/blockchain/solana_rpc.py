@@ -1,11 +1,13 @@
 from solana.rpc.api import Client
 from solana.rpc.websocket_api import connect
 from solders.pubkey import Pubkey as PublicKey
+from solders.rpc.config import RpcTransactionLogsFilterMentions
 from solana.rpc.types import TokenAccountOpts
 from config.rpc_endpoints import QUICKNODE_RPC_HTTP, QUICKNODE_RPC_WS
 from src.utils.logger import setup_logger
 import asyncio
 import json
+import requests
 
 logger = setup_logger(__name__)
 
@@ -19,7 +21,15 @@ class SolanaRPC:
             response = self.http_client.get_latest_blockhash()
             return response.value
         except Exception as e:
-            logger.error(f"Error al obtener el último blockhash: {e}")
+            logger.error("Error al obtener el último blockhash: %s", e)
+            return None
+
+    def get_slot(self):
+        try:
+            response = self.http_client.get_slot()
+            return response.value
+        except Exception as e:
+            logger.error("Error al obtener el slot actual: %s", e)
             return None
 
     def get_token_supply(self, mint_address):
@@ -27,7 +37,7 @@ class SolanaRPC:
             response = self.http_client.get_token_supply(PublicKey(mint_address))
             return response.value.amount
         except Exception as e:
-            logger.error(f"Error al obtener el suministro del token {mint_address}: {e}")
+            logger.error("Error al obtener el suministro del token %s: %s", mint_address, e)
             return None
 
     def get_token_account_balance(self, token_account_address):
@@ -35,7 +45,7 @@ class SolanaRPC:
             response = self.http_client.get_token_account_balance(PublicKey(token_account_address))
             return response.value.amount
         except Exception as e:
-            logger.error(f"Error al obtener el balance de la cuenta de token {token_account_address}: {e}")
+            logger.error("Error al obtener el balance de la cuenta de token %s: %s", token_account_address, e)
             return None
 
     def get_token_metadata(self, mint_address):
@@ -64,31 +74,74 @@ class SolanaRPC:
                 return {"mint": mint_address, "decimals": decimals, "symbol": symbol}
             return None
         except Exception as e:
-            logger.error(f"Error al obtener metadatos del token {mint_address}: {e}")
+            logger.error("Error al obtener metadatos del token %s: %s", mint_address, e)
             return None
 
+    def _rpc_request(self, method, params):
+        # Raw JSON-RPC call for methods whose jsonParsed output is easier to consume as plain dicts
+        body = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+        response = requests.post(QUICKNODE_RPC_HTTP, json=body, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(data["error"])
+        return data["result"]
+
+    def get_transaction_json(self, signature, commitment="confirmed"):
+        """
+        Obtiene una transacción en formato jsonParsed (cuentas de cada instrucción ya resueltas).
+
+        Returns:
+            dict: Resultado de getTransaction, None si no se encuentra o hay un error.
+        """
+        try:
+            return self._rpc_request("getTransaction", [
+                signature,
+                {"encoding": "jsonParsed", "commitment": commitment, "maxSupportedTransactionVersion": 0},
+            ])
+        except Exception as e:
+            logger.error("Error al obtener la transacción %s: %s", signature, e)
+            return None
+
+    def get_multiple_accounts_json(self, addresses, commitment="confirmed"):
+        """
+        Obtiene varias cuentas en una sola llamada RPC (jsonParsed para mints y cuentas de token).
+
+        Returns:
+            tuple: (slot, lista de cuentas en el mismo orden que `addresses`), (None, None) en caso de error.
+        """
+        try:
+            result = self._rpc_request("getMultipleAccounts", [
+                addresses,
+                {"encoding": "jsonParsed", "commitment": commitment},
+            ])
+            return result["context"]["slot"], result["value"]
+        except Exception as e:
+            logger.error("Error al obtener las cuentas %s: %s", addresses, e)
+            return None, None
+
     async def connect_websocket(self):
         if not self.ws_client:
             try:
                 self.ws_client = await connect(QUICKNODE_RPC_WS)
                 logger.info("Conexión WebSocket establecida con Solana RPC.")
             except Exception as e:
-                logger.error(f"Error al conectar WebSocket a Solana RPC: {e}")
+                logger.error("Error al conectar WebSocket a Solana RPC: %s", e)
                 self.ws_client = None
         return self.ws_client
 
-    async def subscribe_to_logs(self, program_id, callback):
+    async def subscribe_to_logs(self, program_id, callback, commitment="finalized"):
         if not await self.connect_websocket():
             return
         try:
             # Subscribe to logs for a specific program ID
             # This is useful for detecting new pool creations or significant events
-            await self.ws_client.logs_subscribe(program_id, commitment="finalized")
-            logger.info(f"Suscrito a logs del programa: {program_id}")
+            await self.ws_client.logs_subscribe(RpcTransactionLogsFilterMentions(PublicKey.from_string(program_id)), commitment=commitment)
+            logger.info("Suscrito a logs del programa: %s", program_id)
             async for msg in self.ws_client:
                 await callback(msg)
         except Exception as e:
-            logger.error(f"Error en la suscripción a logs para {program_id}: {e}")
+            logger.error("Error en la suscripción a logs para %s: %s", program_id, e)
 
     async def subscribe_to_program_accounts(self, program_id, callback):
         if not await self.connect_websocket():
@@ -97,11 +150,11 @@ class SolanaRPC:
             # Subscribe to account changes for a specific program ID
             # This can be used to monitor changes in pool accounts (e.g., liquidity changes)
             await self.ws_client.program_subscribe(program_id, commitment="finalized")
-            logger.info(f"Suscrito a cuentas del programa: {program_id}")
+            logger.info("Suscrito a cuentas del programa: %s", program_id)
             async for msg in self.ws_client:
                 await callback(msg)
         except Exception as e:
-            logger.error(f"Error en la suscripción a cuentas del programa {program_id}: {e}")
+            logger.error("Error en la suscripción a cuentas del programa %s: %s", program_id, e)
 
     async def close_websocket(self):
         if self.ws_client:
@@ -109,7 +162,7 @@ class SolanaRPC:
                 await self.ws_client.close()
                 logger.info("Conexión WebSocket cerrada.")
             except Exception as e:
-                logger.error(f"Error al cerrar conexión WebSocket: {e}")
+                logger.error("Error al cerrar conexión WebSocket: %s", e)
             finally:
                 self.ws_client = None
 
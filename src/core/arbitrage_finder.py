@@ -1,14 +1,20 @@
+import asyncio
 import time
 from src.api.jupiter import JupiterAPI
 from src.api.meteora import MeteoraAPI
 from src.core.simulation import Simulation
+from src.core.new_pool_detector import read_onchain_pool
 from src.blockchain.solana_rpc import SolanaRPC
-from config.settings import MIN_PROFIT_PERCENTAGE, TRADE_CAPITAL_SOL, BASE_TOKENS
+from config.settings import MIN_PROFIT_PERCENTAGE, TRADE_CAPITAL_SOL, BASE_TOKENS, QUOTE_CACHE_TTL_SECONDS
 from src.utils.logger import setup_logger
-from src.utils.helpers import to_raw_amount, to_human_readable # Import new helper functions
+from src.utils.helpers import to_raw_amount, to_human_readable, oldest_input_time # Import new helper functions
 
 logger = setup_logger(__name__)
 
+# Resultado de evaluación cuando falta algún input (cotización, estado de la pool o simulación).
+# Se distingue de None, que significa que la ganancia no alcanza MIN_PROFIT_PERCENTAGE.
+INPUTS_UNAVAILABLE = object()
+
 class ArbitrageFinder:
     def __init__(self):
         self.jupiter_api = JupiterAPI()
@@ -18,6 +24,10 @@ class ArbitrageFinder:
         self.opportunities = []
         self.token_decimals_cache = {}
         self.token_symbol_cache = {} # New cache for token symbols
+        self.quote_cache = {} # (input_mint, output_mint, amount) -> (quote, quote_inputs), short TTL
+        # Pools detected on-chain that the REST listing doesn't include yet, by address.
+        # Only pools referenced by a live opportunity are kept.
+        self.onchain_pools = {}
 
     async def _get_token_decimals(self, mint_address):
         if mint_address not in self.token_decimals_cache:
@@ -30,7 +40,7 @@ class ArbitrageFinder:
                 if token_meta and token_meta.get("decimals") is not None:
                     self.token_decimals_cache[mint_address] = token_meta["decimals"]
                 else:
-                    logger.warning(f"No se pudieron obtener los decimales para el token: {mint_address}. Usando 6 por defecto.")
+                    logger.warning("No se pudieron obtener los decimales para el token: %s. Usando 6 por defecto.", mint_address)
                     self.token_decimals_cache[mint_address] = 6
         return self.token_decimals_cache[mint_address]
 
@@ -45,126 +55,387 @@ class ArbitrageFinder:
                 if token_meta and token_meta.get("symbol"):
                     self.token_symbol_cache[mint_address] = token_meta["symbol"]
                 else:
-                    logger.warning(f"No se pudo obtener el símbolo para el token: {mint_address}. Usando la dirección como símbolo.")
+                    logger.warning("No se pudo obtener el símbolo para el token: %s. Usando la dirección como símbolo.", mint_address)
                     self.token_symbol_cache[mint_address] = mint_address # Fallback to address if symbol not found
         return self.token_symbol_cache[mint_address]
 
+    def _resolve_pair(self, pool):
+        """
+        Devuelve (base_mint, meme_mint) si la pool es un par memecoin/token base, None en caso contrario.
+        """
+        mint_x = pool.get("mint_x")
+        mint_y = pool.get("mint_y")
+
+        if mint_x in BASE_TOKENS.values():
+            return mint_x, mint_y
+        elif mint_y in BASE_TOKENS.values():
+            return mint_y, mint_x
+        return None
+
+    async def _get_quote(self, input_mint, output_mint, amount):
+        """
+        Cotiza en Jupiter fuera del event loop y registra el slot y el momento de la cotización.
+        Las cotizaciones se reutilizan durante QUOTE_CACHE_TTL_SECONDS (p. ej. las precalentadas para pools nuevas).
+        """
+        key = (input_mint, output_mint, amount)
+        cached = self.quote_cache.get(key)
+        if cached and time.time() - cached[1]["fetched_at"] < QUOTE_CACHE_TTL_SECONDS:
+            return cached
+
+        quote = await asyncio.to_thread(self.jupiter_api.get_quote, input_mint, output_mint, amount)
+        if not quote:
+            return None, None
+        entry = (quote, {"slot": quote.get("contextSlot"), "fetched_at": time.time()})
+        if len(self.quote_cache) >= 1024:
+            now = time.time()
+            self.quote_cache = {k: v for k, v in self.quote_cache.items() if now - v[1]["fetched_at"] < QUOTE_CACHE_TTL_SECONDS}
+        self.quote_cache[key] = entry
+        return entry
+
+    async def warm_new_pool(self, base_mint, meme_mint):
+        """
+        Precarga el símbolo de la memecoin y la cotización de compra en Jupiter de una pool recién creada,
+        para que su primera evaluación no espere a la red.
+        """
+        async def warm_symbol():
+            if meme_mint not in self.token_symbol_cache:
+                token_meta = await asyncio.to_thread(self.solana_rpc.get_token_metadata, meme_mint)
+                if token_meta and token_meta.get("symbol"):
+                    self.token_symbol_cache[meme_mint] = token_meta["symbol"]
+
+        base_token_decimals = await self._get_token_decimals(base_mint)
+        trade_capital_lamports = to_raw_amount(TRADE_CAPITAL_SOL, base_token_decimals)
+        await asyncio.gather(warm_symbol(), self._get_quote(base_mint, meme_mint, trade_capital_lamports))
+
+    async def _evaluate_jupiter_to_meteora(self, pool, pool_inputs, base_mint, meme_mint):
+        pool_address = pool["address"]
+        base_token_symbol = await self._get_token_symbol(base_mint)
+        meme_token_symbol = await self._get_token_symbol(meme_mint)
+        base_token_decimals = await self._get_token_decimals(base_mint)
+        trade_capital_lamports = to_raw_amount(TRADE_CAPITAL_SOL, base_token_decimals)
+
+        # --- Simulación: Comprar en Jupiter, Vender en Meteora ---
+        try:
+            jupiter_quote_buy, quote_inputs = await self._get_quote(base_mint, meme_mint, trade_capital_lamports)
+            if not jupiter_quote_buy:
+                logger.warning("No se obtuvo cotización de Jupiter para comprar %s con %s.", meme_token_symbol, base_token_symbol)
+                return INPUTS_UNAVAILABLE
+
+            meme_amount_from_jupiter = int(jupiter_quote_buy["outAmount"])
+            meteora_sim_sell_result = self.simulation.simulate_meteora_swap(
+                pool_address, meme_mint, base_mint, meme_amount_from_jupiter, pool
+            )
+
+            if not meteora_sim_sell_result:
+                return INPUTS_UNAVAILABLE
+            if meteora_sim_sell_result["out_amount"] > 0:
+                net_profit_buy_jupiter_sell_meteora = meteora_sim_sell_result["out_amount"] - trade_capital_lamports
+                profit_percentage = (net_profit_buy_jupiter_sell_meteora / trade_capital_lamports) * 100
+
+                if profit_percentage >= MIN_PROFIT_PERCENTAGE:
+                    logger.info("Oportunidad detectada (J->M): %s/%s - %.4f%% de ganancia.", meme_token_symbol, base_token_symbol, profit_percentage,
+                                extra={"event": "opportunity", "pool": pool_address, "direction": "J->M"})
+                    return {
+                        "id": f"{pool_address}:J->M",
+                        "pair": f"{meme_token_symbol}/{base_token_symbol}",
+                        "direction": "Jupiter -> Meteora",
+                        "capital": f"{TRADE_CAPITAL_SOL} {base_token_symbol}",
+                        "net_profit_lamports": net_profit_buy_jupiter_sell_meteora,
+                        "profit_percentage": round(profit_percentage, 4),
+                        "buy_platform": "Jupiter",
+                        "sell_platform": "Meteora",
+                        "jupiter_link": f"https://jup.ag/swap/{base_token_symbol}-{meme_token_symbol}?amount={to_human_readable(trade_capital_lamports, base_token_decimals)}",
+                        "meteora_link": f"https://app.meteora.ag/pools/{pool_address}",
+                        "pool_address": pool_address,
+                        "inputs": {"pool": pool_inputs, "jupiter_quote": quote_inputs},
+                        "timestamp": int(time.time())
+                    }
+
+        except Exception as e:
+            logger.error("Error en simulación J->M para %s/%s: %s", meme_token_symbol, base_token_symbol, e)
+            return INPUTS_UNAVAILABLE
+        return None
+
+    async def _evaluate_meteora_to_jupiter(self, pool, pool_inputs, base_mint, meme_mint):
+        pool_address = pool["address"]
+        base_token_symbol = await self._get_token_symbol(base_mint)
+        meme_token_symbol = await self._get_token_symbol(meme_mint)
+        base_token_decimals = await self._get_token_decimals(base_mint)
+        trade_capital_lamports = to_raw_amount(TRADE_CAPITAL_SOL, base_token_decimals)
+
+        # --- Simulación: Comprar en Meteora, Vender en Jupiter ---
+        try:
+            meteora_sim_buy_result = self.simulation.simulate_meteora_swap(
+                pool_address, base_mint, meme_mint, trade_capital_lamports, pool
+            )
+
+            if not meteora_sim_buy_result:
+                return INPUTS_UNAVAILABLE
+            if meteora_sim_buy_result["out_amount"] > 0:
+                meme_amount_from_meteora = meteora_sim_buy_result["out_amount"]
+
+                jupiter_quote_sell, quote_inputs = await self._get_quote(meme_mint, base_mint, meme_amount_from_meteora)
+                if not jupiter_quote_sell:
+                    logger.warning("No se obtuvo cotización de Jupiter para vender %s por %s.", meme_token_symbol, base_token_symbol)
+                    return INPUTS_UNAVAILABLE
+
+                net_profit_buy_meteora_sell_jupiter = int(jupiter_quote_sell["outAmount"]) - trade_capital_lamports
+                profit_percentage = (net_profit_buy_meteora_sell_jupiter / trade_capital_lamports) * 100
+
+                if profit_percentage >= MIN_PROFIT_PERCENTAGE:
+                    logger.info("Oportunidad detectada (M->J): %s/%s - %.4f%% de ganancia.", meme_token_symbol, base_token_symbol, profit_percentage,
+                                extra={"event": "opportunity", "pool": pool_address, "direction": "M->J"})
+                    return {
+                        "id": f"{pool_address}:M->J",
+                        "pair": f"{meme_token_symbol}/{base_token_symbol}",
+                        "direction": "Meteora -> Jupiter",
+                        "capital": f"{TRADE_CAPITAL_SOL} {base_token_symbol}",
+                        "net_profit_lamports": net_profit_buy_meteora_sell_jupiter,
+                        "profit_percentage": round(profit_percentage, 4),
+                        "buy_platform": "Meteora",
+                        "sell_platform": "Jupiter",
+                        "jupiter_link": f"https://jup.ag/swap/{meme_token_symbol}-{base_token_symbol}?amount={to_human_readable(meme_amount_from_meteora, await self._get_token_decimals(meme_mint))}",
+                        "meteora_link": f"https://app.meteora.ag/pools/{pool_address}",
+                        "pool_address": pool_address,
+                        "inputs": {"pool": pool_inputs, "jupiter_quote": quote_inputs},
+                        "timestamp": int(time.time())
+                    }
+
+        except Exception as e:
+            logger.error("Error en simulación M->J para %s/%s: %s", meme_token_symbol, base_token_symbol, e)
+            return INPUTS_UNAVAILABLE
+        return None
+
+    async def _evaluate_pool(self, pool, listing_inputs, base_mint, meme_mint):
+        """
+        Evalúa ambas direcciones de una pool del listado. Si alguna da oportunidad, la pool se
+        vuelve a leer y se re-evalúa, para que lo publicado no herede la edad del listado.
+        """
+        evaluators = (self._evaluate_jupiter_to_meteora, self._evaluate_meteora_to_jupiter)
+        candidates = [evaluate for evaluate in evaluators
+                      if isinstance(await evaluate(pool, listing_inputs, base_mint, meme_mint), dict)]
+        if not candidates:
+            return []
+
+        fresh_pool, pool_inputs = await self._refresh_pool(pool["address"])
+        if fresh_pool is None:
+            # Sin estado fresco se publica con la edad del listado; expire_stale decide
+            fresh_pool, pool_inputs = pool, listing_inputs
+
+        found = []
+        for evaluate in candidates:
+            opportunity = await evaluate(fresh_pool, pool_inputs, base_mint, meme_mint)
+            if isinstance(opportunity, dict):
+                found.append(opportunity)
+        return found
+
+    async def _refresh_pool(self, pool_address):
+        """
+        Lee el estado actual de una pool: on-chain si aún no está en la API de Meteora, desde la API si lo está.
+
+        Returns:
+            tuple: (pool, pool_inputs) con el slot y el momento de lectura, (None, None) si no está disponible.
+        """
+        onchain_pool = self.onchain_pools.get(pool_address)
+        if onchain_pool:
+            try:
+                pool, pool_inputs, _ = await asyncio.to_thread(
+                    read_onchain_pool, self.solana_rpc, pool_address, onchain_pool["mint_x"], onchain_pool["mint_y"],
+                    onchain_pool["token_a_vault"], onchain_pool["token_b_vault"],
+                )
+            except Exception as e:
+                logger.error("Error al leer on-chain la pool %s: %s", pool_address, e)
+                return None, None
+            return pool, pool_inputs
+
+        details = await asyncio.to_thread(self.meteora_api.get_damm_v2_pool_details, pool_address)
+        if not details:
+            return None, None
+        pool = details.get("data", details)
+        pool.setdefault("address", pool_address)
+        slot = await asyncio.to_thread(self.solana_rpc.get_slot)
+        return pool, {"slot": slot, "fetched_at": time.time()}
+
     async def find_opportunities(self):
         logger.info("Buscando oportunidades de arbitraje...")
-        self.opportunities = []
+        confirmed_ids = set() # Opportunities found again during this scan
 
-        one_day_ago_timestamp = int(time.time()) - (24 * 60 * 60)
-
-        meteora_pools = self.meteora_api.get_damm_v2_pools(created_within_hours=24)
+        meteora_pools = await asyncio.to_thread(self.meteora_api.get_damm_v2_pools, created_within_hours=24)
         if not meteora_pools:
             logger.warning("No se pudieron obtener o no hay pools de Meteora DAMM v2 recientes.")
             return
 
+        # El listado REST no incluye el slot del estado de cada pool; se registra el slot en que se leyó.
+        # Un escaneo completo puede durar más que OPPORTUNITY_TTL_SECONDS, así que las pools con
+        # oportunidad se vuelven a leer (ver _evaluate_pool) y se incorporan al conjunto vivo en el
+        # momento, sin esperar al final del escaneo.
+        listing_inputs = {"slot": await asyncio.to_thread(self.solana_rpc.get_slot), "fetched_at": time.time()}
+
         for pool in meteora_pools:
             pool_address = pool.get("address")
             mint_x = pool.get("mint_x")
             mint_y = pool.get("mint_y")
 
             if not pool_address or not mint_x or not mint_y:
-                logger.warning(f"Pool de Meteora incompleta, saltando: {pool}")
-                continue
-
-            is_sol_pair = mint_x == BASE_TOKENS["SOL"] or mint_y == BASE_TOKENS["SOL"]
-            is_usdc_pair = mint_x == BASE_TOKENS["USDC"] or mint_y == BASE_TOKENS["USDC"]
-
-            if not (is_sol_pair or is_usdc_pair):
+                logger.warning("Pool de Meteora incompleta, saltando: %s", pool)
                 continue
 
-            if mint_x in BASE_TOKENS.values():
-                base_mint = mint_x
-                meme_mint = mint_y
-            elif mint_y in BASE_TOKENS.values():
-                base_mint = mint_y
-                meme_mint = mint_x
-            else:
+            pair = self._resolve_pair(pool)
+            if not pair:
                 continue
+            base_mint, meme_mint = pair
 
             base_token_symbol = await self._get_token_symbol(base_mint)
             meme_token_symbol = await self._get_token_symbol(meme_mint)
 
-            logger.info(f"Analizando par {meme_token_symbol}/{base_token_symbol} en pool Meteora {pool_address}")
+            logger.info("Analizando par %s/%s en pool Meteora %s", meme_token_symbol, base_token_symbol, pool_address,
+                        extra={"sample_key": "pool_scan", "pool": pool_address})
 
-            base_token_decimals = await self._get_token_decimals(base_mint)
-            trade_capital_lamports = to_raw_amount(TRADE_CAPITAL_SOL, base_token_decimals)
+            found = await self._evaluate_pool(pool, listing_inputs, base_mint, meme_mint)
+            self._merge_opportunities(found)
+            confirmed_ids.update(opp["id"] for opp in found)
 
-            # --- Simulación: Comprar en Jupiter, Vender en Meteora ---
-            try:
-                jupiter_quote_buy = self.jupiter_api.get_quote(base_mint, meme_mint, trade_capital_lamports)
-                if not jupiter_quote_buy:
-                    logger.warning(f"No se obtuvo cotización de Jupiter para comprar {meme_token_symbol} con {base_token_symbol}.")
-                    continue
+        self._remove_unconfirmed(confirmed_ids, {pool.get("address") for pool in meteora_pools})
+        logger.info("Búsqueda de oportunidades finalizada. Encontradas %s oportunidades.", len(confirmed_ids))
+        return self.opportunities
 
-                meme_amount_from_jupiter = int(jupiter_quote_buy["outAmount"])
-                meteora_sim_sell_result = self.simulation.simulate_meteora_swap(
-                    pool_address, meme_mint, base_mint, meme_amount_from_jupiter, pool
-                )
+    async def evaluate_new_pool(self, pool, pool_inputs):
+        """
+        Evalúa inmediatamente una pool detectada on-chain, sin esperar al siguiente ciclo completo,
+        y añade sus oportunidades al conjunto vivo.
 
-                if meteora_sim_sell_result and meteora_sim_sell_result["out_amount"] > 0:
-                    net_profit_buy_jupiter_sell_meteora = meteora_sim_sell_result["out_amount"] - trade_capital_lamports
-                    profit_percentage = (net_profit_buy_jupiter_sell_meteora / trade_capital_lamports) * 100
-
-                    if profit_percentage >= MIN_PROFIT_PERCENTAGE:
-                        self.opportunities.append({
-                            "pair": f"{meme_token_symbol}/{base_token_symbol}",
-                            "direction": "Jupiter -> Meteora",
-                            "capital": f"{TRADE_CAPITAL_SOL} {base_token_symbol}",
-                            "net_profit_lamports": net_profit_buy_jupiter_sell_meteora,
-                            "profit_percentage": round(profit_percentage, 4),
-                            "buy_platform": "Jupiter",
-                            "sell_platform": "Meteora",
-                            "jupiter_link": f"https://jup.ag/swap/{base_token_symbol}-{meme_token_symbol}?amount={to_human_readable(trade_capital_lamports, base_token_decimals)}",
-                            "meteora_link": f"https://app.meteora.ag/pools/{pool_address}",
-                            "timestamp": int(time.time())
-                        })
-                        logger.info(f"Oportunidad detectada (J->M): {meme_token_symbol}/{base_token_symbol} - {profit_percentage:.4f}% de ganancia.")
+        Returns:
+            list: Oportunidades encontradas en la pool.
+        """
+        pair = self._resolve_pair(pool)
+        if not pair:
+            return []
+        base_mint, meme_mint = pair
 
-            except Exception as e:
-                logger.error(f"Error en simulación J->M para {meme_token_symbol}/{base_token_symbol}: {e}")
+        found = []
+        for evaluate in (self._evaluate_jupiter_to_meteora, self._evaluate_meteora_to_jupiter):
+            opportunity = await evaluate(pool, pool_inputs, base_mint, meme_mint)
+            if isinstance(opportunity, dict):
+                found.append(opportunity)
 
-            # --- Simulación: Comprar en Meteora, Vender en Jupiter ---
-            try:
-                meteora_sim_buy_result = self.simulation.simulate_meteora_swap(
-                    pool_address, base_mint, meme_mint, trade_capital_lamports, pool
-                )
+        self._merge_opportunities(found)
+        if found and pool.get("source") == "onchain":
+            # Keep reading it on-chain until the REST listing includes it
+            self.onchain_pools[pool["address"]] = pool
+        return found
 
-                if meteora_sim_buy_result and meteora_sim_buy_result["out_amount"] > 0:
-                    meme_amount_from_meteora = meteora_sim_buy_result["out_amount"]
-
-                    jupiter_quote_sell = self.jupiter_api.get_quote(meme_mint, base_mint, meme_amount_from_meteora)
-                    if not jupiter_quote_sell:
-                        logger.warning(f"No se obtuvo cotización de Jupiter para vender {meme_token_symbol} por {base_token_symbol}.")
-                        continue
-
-                    net_profit_buy_meteora_sell_jupiter = int(jupiter_quote_sell["outAmount"]) - trade_capital_lamports
-                    profit_percentage = (net_profit_buy_meteora_sell_jupiter / trade_capital_lamports) * 100
-
-                    if profit_percentage >= MIN_PROFIT_PERCENTAGE:
-                        self.opportunities.append({
-                            "pair": f"{meme_token_symbol}/{base_token_symbol}",
-                            "direction": "Meteora -> Jupiter",
-                            "capital": f"{TRADE_CAPITAL_SOL} {base_token_symbol}",
-                            "net_profit_lamports": net_profit_buy_meteora_sell_jupiter,
-                            "profit_percentage": round(profit_percentage, 4),
-                            "buy_platform": "Meteora",
-                            "sell_platform": "Jupiter",
-                            "jupiter_link": f"https://jup.ag/swap/{meme_token_symbol}-{base_token_symbol}?amount={to_human_readable(meme_amount_from_meteora, await self._get_token_decimals(meme_mint))}",
-                            "meteora_link": f"https://app.meteora.ag/pools/{pool_address}",
-                            "timestamp": int(time.time())
-                        })
-                        logger.info(f"Oportunidad detectada (M->J): {meme_token_symbol}/{base_token_symbol} - {profit_percentage:.4f}% de ganancia.")
+    async def revalidate_opportunity(self, opportunity):
+        """
+        Vuelve a leer la pool y a cotizar en Jupiter una oportunidad existente, solo en su dirección.
 
-            except Exception as e:
-                logger.error(f"Error en simulación M->J para {meme_token_symbol}/{base_token_symbol}: {e}")
+        Args:
+            opportunity (dict): Oportunidad a revalidar.
 
-        logger.info(f"Búsqueda de oportunidades finalizada. Encontradas {len(self.opportunities)} oportunidades.")
-        return self.opportunities
+        Returns:
+            dict: La oportunidad recalculada.
+            None: Si ya no supera MIN_PROFIT_PERCENTAGE.
+            INPUTS_UNAVAILABLE: Si no se pudo refrescar alguno de sus inputs (se deja al TTL).
+        """
+        pool, pool_inputs = await self._refresh_pool(opportunity["pool_address"])
+        if pool is None:
+            return INPUTS_UNAVAILABLE
+
+        pair = self._resolve_pair(pool)
+        if not pair:
+            return INPUTS_UNAVAILABLE
+        base_mint, meme_mint = pair
+
+        if opportunity["id"].endswith("J->M"):
+            return await self._evaluate_jupiter_to_meteora(pool, pool_inputs, base_mint, meme_mint)
+        return await self._evaluate_meteora_to_jupiter(pool, pool_inputs, base_mint, meme_mint)
+
+    def _merge_opportunities(self, found):
+        """
+        Incorpora al conjunto vivo las oportunidades recién evaluadas, sustituyendo las de mismo id
+        y conservando su `first_seen`.
+        """
+        now = time.time()
+        previous = {opp["id"]: opp for opp in self.opportunities}
+        for opp in found:
+            opp["first_seen"] = previous.get(opp["id"], opp).get("first_seen", now)
+            opp["last_validated"] = now
+        found_ids = {opp["id"] for opp in found}
+        self.opportunities = [opp for opp in self.opportunities if opp["id"] not in found_ids] + found
+
+    def _remove_unconfirmed(self, confirmed_ids, listed_addresses):
+        """
+        Al final de un escaneo, elimina las oportunidades que el escaneo no volvió a encontrar y
+        registra su vida observada.
+
+        Las oportunidades de pools detectadas on-chain que el listado REST aún no incluye se
+        conservan: el escaneo no las ha evaluado, así que no puede darlas por desaparecidas.
+        """
+        now = time.time()
+        for address in listed_addresses & self.onchain_pools.keys():
+            del self.onchain_pools[address] # Indexed by the REST API; from now on it's a regular pool
+
+        current = []
+        for opp in self.opportunities:
+            if opp["id"] in confirmed_ids or opp["pool_address"] in self.onchain_pools:
+                current.append(opp)
+            else:
+                self._record_expiry(opp, "rescan", now)
+        self.opportunities = current
+        self._prune_onchain_pools()
+
+    def apply_revalidation(self, results):
+        """
+        Aplica el resultado de una pasada de revalidación sobre el conjunto actual.
+
+        Args:
+            results (list): Pares (oportunidad revalidada, resultado); el resultado es la oportunidad
+                recalculada o None si su ganancia cayó por debajo del mínimo.
+
+        Solo se tocan las oportunidades que siguen siendo el mismo objeto que se revalidó: si un
+        escaneo completo o una pool nueva la sustituyó mientras tanto, su versión es más reciente.
+        """
+        now = time.time()
+        results_by_id = {original["id"]: (original, result) for original, result in results}
+        current = []
+        for opp in self.opportunities:
+            original, result = results_by_id.get(opp["id"], (None, None))
+            if original is opp:
+                if result is None:
+                    self._record_expiry(opp, "revalidation", now)
+                    continue
+                result["first_seen"] = opp["first_seen"]
+                result["last_validated"] = now
+                opp = result
+            current.append(opp)
+        self.opportunities = current
+        self._prune_onchain_pools()
+
+    def expire_stale(self, ttl_seconds):
+        """
+        Elimina las oportunidades cuyo input más antiguo supera `ttl_seconds`.
+        """
+        now = time.time()
+        current = []
+        for opp in self.opportunities:
+            if now - oldest_input_time(opp) > ttl_seconds:
+                self._record_expiry(opp, "ttl", now)
+            else:
+                current.append(opp)
+        self.opportunities = current
+        self._prune_onchain_pools()
+
+    def _prune_onchain_pools(self):
+        referenced = {opp["pool_address"] for opp in self.opportunities}
+        self.onchain_pools = {address: pool for address, pool in self.onchain_pools.items() if address in referenced}
+
+    def _record_expiry(self, opp, reason, now):
+        # Una revalidación observa la desaparición en `now`; en ttl y rescan solo se sabe que seguía
+        # viva en su última validación, así que se cuenta hasta ahí.
+        last_seen = now if reason == "revalidation" else opp.get("last_validated", now)
+        lifetime = last_seen - opp.get("first_seen", last_seen)
+        logger.info("Oportunidad expirada (%s): %s %s tras %.1fs", reason, opp["pair"], opp["direction"], lifetime,
+                    extra={"event": "opportunity_expired", "pool": opp.get("pool_address"), "reason": reason, "lifetime_seconds": round(lifetime, 3)})
 
     def get_current_opportunities(self):
         return self.opportunities
 
-
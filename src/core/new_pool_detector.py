@@ -0,0 +1,221 @@
+
+import asyncio
+import base64
+import hashlib
+import struct
+import time
+from collections import deque
+from config.settings import BASE_TOKENS, DAMM_V2_PROGRAM_ID, NEW_POOL_COMMITMENT
+from src.utils.logger import setup_logger
+from src.utils.helpers import b58decode, b58encode
+
+logger = setup_logger(__name__)
+
+# Posición de cada cuenta en las instrucciones de creación de pool del programa DAMM v2 (IDL de cp-amm).
+# Las vaults dan las reservas iniciales, ya que la API REST aún no conoce la pool.
+INIT_POOL_ACCOUNT_LAYOUTS = {
+    "initialize_pool": {"pool": 6, "token_a_mint": 8, "token_b_mint": 9, "token_a_vault": 10, "token_b_vault": 11},
+    "initialize_pool_with_dynamic_config": {"pool": 7, "token_a_mint": 9, "token_b_mint": 10, "token_a_vault": 11, "token_b_vault": 12},
+    "initialize_customizable_pool": {"pool": 5, "token_a_mint": 7, "token_b_mint": 8, "token_a_vault": 9, "token_b_vault": 10},
+}
+
+# Discriminador Anchor (8 bytes) de cada instrucción -> nombre
+INIT_POOL_DISCRIMINATORS = {
+    hashlib.sha256(f"global:{name}".encode()).digest()[:8]: name for name in INIT_POOL_ACCOUNT_LAYOUTS
+}
+
+# Offsets en la cuenta Pool de cp-amm (tras el discriminador de 8 bytes y PoolFeesStruct de 160 bytes)
+POOL_CLIFF_FEE_NUMERATOR_OFFSET = 8   # pool_fees.base_fee.cliff_fee_numerator (u64)
+POOL_TOKEN_A_MINT_OFFSET = 168
+POOL_TOKEN_B_MINT_OFFSET = 200
+POOL_SQRT_PRICE_OFFSET = 456          # sqrt_price (u128, Q64.64)
+FEE_DENOMINATOR = 1_000_000_000
+
+INIT_POOL_LOG_LINES = (
+    "Program log: Instruction: InitializePool",
+    "Program log: Instruction: InitializePoolWithDynamicConfig",
+    "Program log: Instruction: InitializeCustomizablePool",
+)
+
+class NewPoolDetector:
+    """
+    Detecta pools DAMM v2 nuevas a partir de los logs del programa y las evalúa de inmediato.
+
+    Por cada transacción de creación se leen la pool, ambos mints y sus vaults en una sola
+    llamada RPC, se precalientan metadatos y cotización, y la pool se evalúa antes que cualquier
+    otra. La latencia detección -> evaluación se emite en el log como evento `new_pool`.
+    """
+
+    def __init__(self, arbitrage_finder, on_update=None):
+        self.arbitrage_finder = arbitrage_finder
+        self.solana_rpc = arbitrage_finder.solana_rpc
+        self.on_update = on_update # Called with the current opportunities after each new pool
+        self._seen_signatures = deque(maxlen=1000)
+        self._tasks = set() # Strong references to in-flight evaluations
+
+    async def run(self):
+        while True:
+            await self.solana_rpc.subscribe_to_logs(DAMM_V2_PROGRAM_ID, self.handle_message, commitment=NEW_POOL_COMMITMENT)
+            # subscribe_to_logs only returns if the subscription fails; reconnect
+            await self.solana_rpc.close_websocket()
+            await asyncio.sleep(1)
+
+    async def handle_message(self, msg):
+        for notification in msg if isinstance(msg, list) else [msg]:
+            value = getattr(getattr(notification, "result", None), "value", None)
+            if value is None or value.err is not None or not hasattr(value, "logs"):
+                continue # Subscription confirmation or failed transaction
+            if not any(line.startswith(INIT_POOL_LOG_LINES) for line in value.logs):
+                continue
+            signature = str(value.signature)
+            if signature in self._seen_signatures:
+                continue
+            self._seen_signatures.append(signature)
+            detected_at = time.perf_counter()
+            # Evaluate without blocking the subscription stream
+            task = asyncio.create_task(self._process(signature, notification.result.context.slot, detected_at))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _find_init_instructions(self, transaction):
+        """
+        Devuelve (nombre, cuentas) de cada instrucción de creación de pool, incluidas las CPI
+        (p. ej. migraciones desde launchpads que crean la pool DAMM v2 internamente).
+        """
+        message = transaction["transaction"]["message"]
+        instructions = list(message.get("instructions", []))
+        for inner in (transaction.get("meta") or {}).get("innerInstructions") or []:
+            instructions.extend(inner.get("instructions", []))
+
+        found = []
+        for ix in instructions:
+            if ix.get("programId") != DAMM_V2_PROGRAM_ID or "data" not in ix:
+                continue
+            name = INIT_POOL_DISCRIMINATORS.get(b58decode(ix["data"])[:8])
+            if name:
+                found.append((name, ix["accounts"]))
+        return found
+
+    async def _process(self, signature, detected_slot, detected_at):
+        try:
+            transaction = await asyncio.to_thread(self.solana_rpc.get_transaction_json, signature, NEW_POOL_COMMITMENT)
+            if not transaction:
+                return
+            instructions = self._find_init_instructions(transaction)
+        except Exception as e:
+            logger.error("Error al leer la transacción de pool nueva %s: %s", signature, e)
+            return
+
+        # Cada pool por separado: un fallo en una no impide evaluar las demás de la misma transacción
+        for name, accounts in instructions:
+            try:
+                await self._process_pool(INIT_POOL_ACCOUNT_LAYOUTS[name], accounts, detected_slot, detected_at)
+            except Exception as e:
+                logger.error("Error al procesar una pool nueva de la transacción %s: %s", signature, e)
+
+    async def _process_pool(self, layout, accounts, detected_slot, detected_at):
+        pool_address = accounts[layout["pool"]]
+        token_a_mint = accounts[layout["token_a_mint"]]
+        token_b_mint = accounts[layout["token_b_mint"]]
+
+        if token_a_mint in BASE_TOKENS.values():
+            base_mint, meme_mint = token_a_mint, token_b_mint
+        elif token_b_mint in BASE_TOKENS.values():
+            base_mint, meme_mint = token_b_mint, token_a_mint
+        else:
+            return
+
+        # Pool, both mints and vaults in one batched RPC, while the buy quote warms up in parallel
+        warmup = asyncio.create_task(self.arbitrage_finder.warm_new_pool(base_mint, meme_mint))
+        try:
+            pool, pool_inputs, account_infos = await asyncio.to_thread(
+                read_onchain_pool, self.solana_rpc, pool_address, token_a_mint, token_b_mint,
+                accounts[layout["token_a_vault"]], accounts[layout["token_b_vault"]],
+            )
+        except BaseException:
+            warmup.cancel()
+            raise
+        finally:
+            # Always retrieve the warmup; if it failed the evaluation just quotes cold
+            await asyncio.gather(warmup, return_exceptions=True)
+        if pool is None:
+            logger.warning("No se pudieron leer las cuentas de la pool nueva %s", pool_address)
+            return
+
+        pool["created_at_slot"] = detected_slot
+        slot = pool_inputs["slot"]
+        # Decimals straight from the mint account, more reliable than the metadata fallback
+        meme_decimals = _parsed_info(account_infos[1 if meme_mint == token_a_mint else 2]).get("decimals")
+        if meme_decimals is not None:
+            self.arbitrage_finder.token_decimals_cache[meme_mint] = meme_decimals
+
+        found = await self.arbitrage_finder.evaluate_new_pool(pool, pool_inputs)
+
+        latency_ms = (time.perf_counter() - detected_at) * 1000
+        logger.info("Pool nueva %s evaluada en %.0f ms (slot %s -> %s), %s oportunidades",
+                    pool_address, latency_ms, detected_slot, slot, len(found),
+                    extra={"event": "new_pool", "pool": pool_address, "detection_to_evaluation_ms": round(latency_ms, 1),
+                           "detected_slot": detected_slot, "state_slot": slot, "opportunities": len(found)})
+
+        if self.on_update:
+            self.on_update(self.arbitrage_finder.get_current_opportunities())
+
+
+def decode_pool_account(data):
+    """
+    Extrae de los datos de una cuenta Pool de DAMM v2 los mints, el sqrt_price y la comisión base.
+    """
+    sqrt_price_low, sqrt_price_high = struct.unpack_from("<QQ", data, POOL_SQRT_PRICE_OFFSET)
+    return {
+        "token_a_mint": b58encode(data[POOL_TOKEN_A_MINT_OFFSET:POOL_TOKEN_A_MINT_OFFSET + 32]),
+        "token_b_mint": b58encode(data[POOL_TOKEN_B_MINT_OFFSET:POOL_TOKEN_B_MINT_OFFSET + 32]),
+        "sqrt_price": sqrt_price_low | (sqrt_price_high << 64),
+        "cliff_fee_numerator": struct.unpack_from("<Q", data, POOL_CLIFF_FEE_NUMERATOR_OFFSET)[0],
+    }
+
+
+def read_onchain_pool(solana_rpc, pool_address, token_a_mint, token_b_mint, token_a_vault, token_b_vault):
+    """
+    Lee en una sola llamada RPC la pool, ambos mints y sus vaults, y construye un dict de pool
+    con el formato de la API REST (bloqueante; llamar con asyncio.to_thread).
+
+    El precio sale del sqrt_price de la pool y la comisión de su cliff_fee_numerator, que es la
+    comisión base máxima (la comisión dinámica no se incluye). Las reservas salen de las vaults.
+
+    Returns:
+        tuple: (pool, pool_inputs, account_infos), (None, None, None) si alguna cuenta no está disponible
+               o la cuenta de la pool no corresponde a sus mints.
+    """
+    addresses = [pool_address, token_a_mint, token_b_mint, token_a_vault, token_b_vault]
+    slot, account_infos = solana_rpc.get_multiple_accounts_json(addresses, NEW_POOL_COMMITMENT)
+    if not account_infos or any(info is None for info in account_infos):
+        return None, None, None
+
+    pool_state = decode_pool_account(base64.b64decode(account_infos[0]["data"][0]))
+    if (pool_state["token_a_mint"], pool_state["token_b_mint"]) != (token_a_mint, token_b_mint) or not pool_state["sqrt_price"]:
+        logger.warning("La cuenta de la pool %s no coincide con el layout esperado de DAMM v2", pool_address)
+        return None, None, None
+
+    # sqrt_price es Q64.64 de token B por token A; Simulation espera unidades de X (A) por Y (B)
+    current_price = (1 << 128) / pool_state["sqrt_price"] ** 2
+    pool = {
+        "address": pool_address,
+        "mint_x": token_a_mint,
+        "mint_y": token_b_mint,
+        "token_a_vault": token_a_vault,
+        "token_b_vault": token_b_vault,
+        "reserve_x_amount": int(_parsed_info(account_infos[3])["tokenAmount"]["amount"]),
+        "reserve_y_amount": int(_parsed_info(account_infos[4])["tokenAmount"]["amount"]),
+        "current_price": current_price,
+        "base_fee_percentage": pool_state["cliff_fee_numerator"] / FEE_DENOMINATOR,
+        "protocol_fee_percentage": 0, # Share of the trading fee, not an extra charge to the trader
+        "source": "onchain",
+    }
+    return pool, {"slot": slot, "fetched_at": time.time()}, account_infos
+
+
+def _parsed_info(account_info):
+    data = account_info.get("data")
+    if isinstance(data, dict):
+        return data.get("parsed", {}).get("info", {})
+    return {}
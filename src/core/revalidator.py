@@ -0,0 +1,57 @@
+
+import asyncio
+import time
+from config.settings import REVALIDATION_INTERVAL, REVALIDATION_TOP_K, OPPORTUNITY_TTL_SECONDS
+from src.core.arbitrage_finder import INPUTS_UNAVAILABLE
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+class OpportunityRevalidator:
+    """
+    Re-simula y re-cotiza las mejores oportunidades cada pocos segundos, entre ciclos completos.
+
+    Solo se refrescan las REVALIDATION_TOP_K oportunidades con mayor ganancia; el resto
+    expira cuando su input más antiguo supera OPPORTUNITY_TTL_SECONDS.
+    """
+
+    def __init__(self, arbitrage_finder, on_update=None):
+        self.arbitrage_finder = arbitrage_finder
+        self.on_update = on_update # Called with the current opportunities after each pass
+
+    async def revalidate_once(self):
+        opportunities = self.arbitrage_finder.get_current_opportunities()
+        top_k = sorted(opportunities, key=lambda opp: opp["profit_percentage"], reverse=True)[:REVALIDATION_TOP_K]
+
+        if top_k:
+            started = time.perf_counter()
+            results = []
+            unavailable = 0
+            for opp in top_k:
+                try:
+                    result = await self.arbitrage_finder.revalidate_opportunity(opp)
+                except Exception as e:
+                    logger.error("Error al revalidar la oportunidad %s: %s", opp["id"], e)
+                    result = INPUTS_UNAVAILABLE
+                if result is INPUTS_UNAVAILABLE:
+                    unavailable += 1
+                    continue # Keep it; the TTL expires it if it can't be refreshed
+                results.append((opp, result))
+
+            self.arbitrage_finder.apply_revalidation(results)
+            logger.info("Revalidación: %s refrescadas, %s descartadas, %s sin inputs en %.2fs",
+                        sum(1 for _, result in results if result is not None),
+                        sum(1 for _, result in results if result is None),
+                        unavailable, time.perf_counter() - started)
+
+        self.arbitrage_finder.expire_stale(OPPORTUNITY_TTL_SECONDS)
+        if self.on_update:
+            self.on_update(self.arbitrage_finder.get_current_opportunities())
+
+    async def run(self):
+        while True:
+            try:
+                await self.revalidate_once()
+            except Exception as e:
+                logger.error("Error en el bucle de revalidación: %s", e)
+            await asyncio.sleep(REVALIDATION_INTERVAL)
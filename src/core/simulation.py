@@ -32,7 +32,7 @@ class Simulation:
             pool_mint_y = pool_data.get("mint_y")
 
             if not current_price or not reserve_x_amount or not reserve_y_amount or not pool_mint_x or not pool_mint_y:
-                logger.warning(f"Datos de pool incompletos para simulación: {pool_address}")
+                logger.warning("Datos de pool incompletos para simulación: %s", pool_address)
                 return None
 
             estimated_output_amount = 0
@@ -43,7 +43,7 @@ class Simulation:
                 # Swapping Y for X
                 estimated_output_amount = int(input_amount_lamports * current_price)
             else:
-                logger.warning(f"Mints no coinciden con la pool {pool_address}. Input: {input_mint}, Output: {output_mint}")
+                logger.warning("Mints no coinciden con la pool %s. Input: %s, Output: %s", pool_address, input_mint, output_mint)
                 return None
 
             # --- Cálculo de Tarifas ---
@@ -84,7 +84,7 @@ class Simulation:
             return {"out_amount": final_output_amount, "slippage_bps": slippage_bps}
 
         except Exception as e:
-            logger.error(f"Error en la simulación de Meteora swap para pool {pool_address}: {e}")
+            logger.error("Error en la simulación de Meteora swap para pool %s: %s", pool_address, e)
             return None
 
     # TODO: Implement a more accurate DAMM v2 simulation based on their whitepaper/SDK
@@ -1,6 +1,5 @@
 import asyncio
-import time
-import threading
+import subprocess
 import sys
 import os
 
@@ -8,56 +7,68 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
 
 from src.core.arbitrage_finder import ArbitrageFinder
+from src.core.revalidator import OpportunityRevalidator
+from src.core.new_pool_detector import NewPoolDetector
 from src.blockchain.solana_rpc import SolanaRPC
 from src.utils.logger import setup_logger
-from config.settings import METEORA_POOLS_POLLING_INTERVAL
+from src.utils.snapshot import OpportunitySnapshotWriter
+from src.utils.profiler import CycleProfiler
+from config.settings import METEORA_POOLS_POLLING_INTERVAL, DASHBOARD_AUTOSTART
 
 logger = setup_logger(__name__)
 
-# Global instance of ArbitrageFinder to be shared with the dashboard
-# In a more complex setup, a message queue or database would be used for inter-process communication
-shared_arbitrage_finder = ArbitrageFinder()
+DASHBOARD_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'dashboard', 'app.py'))
 
 class ArbitrageInfoBot:
     def __init__(self):
-        self.arbitrage_finder = shared_arbitrage_finder
+        self.arbitrage_finder = ArbitrageFinder()
         self.solana_rpc = SolanaRPC()
-
-    def start_dashboard_thread(self):
-        # Import app here to avoid circular dependencies
-        from dashboard.app import app as dashboard_app
-        logger.info("Iniciando el dashboard interactivo en un hilo separado...")
-        # Run Flask app in a separate thread
-        # app.run(debug=True, host=\'0.0.0.0\', port=5000, use_reloader=False) is for development
-        # For production, use a WSGI server like Gunicorn or Waitress
-        dashboard_app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
+        # Opportunities are shared with the dashboard process through a memory-mapped snapshot
+        self.snapshot_writer = OpportunitySnapshotWriter()
+        # Keeps the top opportunities fresh between full scans and publishes after each pass
+        self.revalidator = OpportunityRevalidator(self.arbitrage_finder, on_update=self.snapshot_writer.publish)
+        # Evaluates DAMM v2 pools as soon as their creation shows up in the program logs
+        self.new_pool_detector = NewPoolDetector(self.arbitrage_finder, on_update=self.snapshot_writer.publish)
+        # Opt-in profiling of find_opportunities, armed from the dashboard. The revalidator and the
+        # new-pool evaluations share the event loop, so their stack time is reported separately.
+        self.cycle_profiler = CycleProfiler(task_functions=("find_opportunities", "revalidate_once", "_process"))
+        self.dashboard_process = None
+
+    def start_dashboard_process(self):
+        logger.info("Iniciando el dashboard interactivo en un proceso separado...")
+        # The dashboard only maps the snapshot read-only, so it never competes for the scanner's GIL.
+        # For production, run it under a WSGI server instead, e.g.:
+        #   gunicorn -w 4 -b 0.0.0.0:5000 dashboard.app:app
+        self.dashboard_process = subprocess.Popen([sys.executable, DASHBOARD_SCRIPT])
 
     async def run_arbitrage_finder(self):
         while True:
             logger.info("Iniciando ciclo de búsqueda de arbitraje...")
-            await self.arbitrage_finder.find_opportunities()
+            async with self.cycle_profiler.cycle():
+                await self.arbitrage_finder.find_opportunities()
             opportunities = self.arbitrage_finder.get_current_opportunities()
-            logger.info(f"Oportunidades actuales encontradas: {len(opportunities)}")
+            self.snapshot_writer.publish(opportunities)
+            logger.info("Oportunidades actuales encontradas: %s", len(opportunities))
 
-            logger.info(f"Esperando {METEORA_POOLS_POLLING_INTERVAL} segundos para la próxima búsqueda...")
+            logger.info("Esperando %s segundos para la próxima búsqueda...", METEORA_POOLS_POLLING_INTERVAL)
             await asyncio.sleep(METEORA_POOLS_POLLING_INTERVAL)
 
     async def start_solana_listeners(self):
-        # Placeholder for starting WebSocket listeners for new pools/tokens
         logger.info("Iniciando listeners de Solana RPC (WebSockets)...")
-        # TODO: Implement actual WebSocket subscriptions and handlers
-        pass
+        await self.new_pool_detector.run()
 
     async def start(self):
-        # Start dashboard in a separate thread
-        dashboard_thread = threading.Thread(target=self.start_dashboard_thread, daemon=True)
-        dashboard_thread.start()
+        # Start dashboard in a separate process
+        if DASHBOARD_AUTOSTART:
+            self.start_dashboard_process()
 
-        # Start Solana listeners (if implemented)
-        await self.start_solana_listeners()
+        # Run the full scan, the fast revalidation loop and the Solana listeners concurrently in the main async loop
+        await asyncio.gather(self.run_arbitrage_finder(), self.revalidator.run(), self.start_solana_listeners())
 
-        # Run arbitrage finder in the main async loop
-        await self.run_arbitrage_finder()
+    def stop(self):
+        if self.dashboard_process and self.dashboard_process.poll() is None:
+            self.dashboard_process.terminate()
+        self.snapshot_writer.close()
 
 if __name__ == "__main__":
     bot = ArbitrageInfoBot()
@@ -66,7 +77,9 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Bot detenido por el usuario.")
     except Exception as e:
-        logger.error(f"Error inesperado en el bot: {e}")
+        logger.error("Error inesperado en el bot: %s", e)
+    finally:
+        bot.stop()
 
 
 
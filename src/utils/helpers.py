@@ -27,4 +27,39 @@ def to_raw_amount(human_readable_amount, decimals):
         raise ValueError("Human readable amount must be numeric and decimals must be an integer.")
     return int(human_readable_amount * (10**decimals))
 
+def oldest_input_time(opportunity):
+    """
+    Devuelve el momento de lectura del input más antiguo (estado de pool o cotización) de una oportunidad.
+    """
+    inputs = opportunity.get("inputs") or {}
+    fetched = [entry["fetched_at"] for entry in inputs.values() if entry and entry.get("fetched_at")]
+    return min(fetched) if fetched else opportunity.get("timestamp", 0)
+
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+def b58decode(value):
+    """
+    Decodifica una cadena base58 (formato de los datos de instrucción en respuestas jsonParsed).
+    """
+    number = 0
+    for char in value:
+        index = _BASE58_ALPHABET.find(char)
+        if index < 0:
+            raise ValueError(f"Invalid base58 character: {char}")
+        number = number * 58 + index
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading_zeros + decoded
+
+def b58encode(data):
+    """
+    Codifica bytes en base58 (p. ej. una clave pública leída de los datos de una cuenta).
+    """
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading_zeros + encoded
 
@@ -1,25 +1,154 @@
+
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import threading
 
-def setup_logger(name):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+from config.settings import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES
 
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+# Atributos estándar de LogRecord; todo lo demás viene de `extra` y se emite como campo estructurado.
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
 
-    # Console handler
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.INFO)
-    ch.setFormatter(formatter)
-    logger.addHandler(ch)
+# Tipos de argumento cuyo formateo puede diferirse al hilo del listener sin riesgo
+_SCALAR_TYPES = (str, int, float, bool, bytes, type(None))
 
-    # File handler (optional)
-    # fh = logging.FileHandler('bot.log')
-    # fh.setLevel(logging.INFO)
-    # fh.setFormatter(formatter)
-    # logger.addHandler(fh)
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
 
-    return logger
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatea cada registro como una línea JSON.
+    Los campos pasados mediante `extra` se incluyen tal cual junto a los campos básicos.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Muestreo por tipo de mensaje para los logs del bucle caliente.
+
+    Los registros con `extra={"sample_key": ...}` se emiten con la tasa configurada en
+    LOG_SAMPLE_RATES (p. ej. 0.05 -> 1 de cada 20). El registro emitido lleva en
+    `sampled_out` cuántos se descartaron desde el anterior. Warnings y errores nunca se descartan.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.intervals = {key: max(1, round(1 / rate)) for key, rate in rates.items() if rate > 0}
+        self.disabled = {key for key, rate in rates.items() if rate <= 0}
+        self.counters = {}
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        if key in self.disabled:
+            return False
+        interval = self.intervals.get(key)
+        if interval is None:
+            return True
+        # El GIL hace atómica la lectura/escritura del dict; un conteo aproximado es suficiente.
+        count = self.counters.get(key, 0)
+        self.counters[key] = count + 1
+        if count % interval:
+            return False
+        record.sampled_out = interval - 1 if count else 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que no formatea el mensaje en el hilo que loguea.
+
+    El QueueHandler estándar llama a format() en prepare(); aquí el registro se encola tal
+    cual y el formateo ocurre en el hilo del QueueListener, solo si el registro se emite.
+    Solo se difiere con argumentos inmutables: si alguno es mutable (dict, list, objetos...)
+    el mensaje se renderiza aquí, para no mostrar un estado posterior ni competir con el event loop.
+    """
+
+    def prepare(self, record):
+        if record.args and not (isinstance(record.args, tuple) and all(isinstance(arg, _SCALAR_TYPES) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # El traceback retiene frames vivos; se renderiza ahora (camino poco frecuente).
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
 
+def _build_formatter():
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _get_queue_handler():
+    global _queue_handler, _listener
+    with _lock:
+        if _queue_handler is None:
+            log_queue = queue.SimpleQueue()
+
+            # Console handler (se ejecuta en el hilo del listener)
+            ch = logging.StreamHandler()
+            ch.setLevel(LOG_LEVEL)
+            ch.setFormatter(_build_formatter())
+
+            # File handler (optional)
+            # fh = logging.FileHandler('bot.log')
+            # fh.setLevel(LOG_LEVEL)
+            # fh.setFormatter(_build_formatter())
+
+            _queue_handler = DeferredQueueHandler(log_queue)
+            _queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_RATES))
+            _listener = logging.handlers.QueueListener(log_queue, ch, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+    return _queue_handler
+
+
+def shutdown_logging():
+    """
+    Detiene el listener de logging vaciando antes la cola pendiente.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def setup_logger(name):
+    """
+    Devuelve el logger `name` conectado a la cola de logging compartida.
+    Es idempotente: llamarlo varias veces para el mismo nombre no duplica handlers.
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(LOG_LEVEL)
+
+    handler = _get_queue_handler()
+    if handler not in logger.handlers:
+        logger.addHandler(handler)
+    # Evita que un handler en el root (p. ej. basicConfig de Flask/werkzeug) duplique la salida.
+    logger.propagate = False
+
+    return logger
@@ -0,0 +1,370 @@
+
+import asyncio
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+from config.settings import PROFILER_DIR, PROFILER_MAX_CAPTURES, PROFILER_MAX_CYCLES, PROFILER_SAMPLE_INTERVAL
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PROFILER_MODES = ("deterministic", "sampling")
+_REQUEST_FILE = "request.json"
+_CAPTURE_ID = re.compile(r"^[\w-]+$")
+_TOP_ALLOCATIONS = 25
+_frame_labels = {} # code object -> "name (file:line)"
+
+
+def _frame_label(code):
+    label = _frame_labels.get(code)
+    if label is None:
+        label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+        _frame_labels[code] = label
+    return label
+
+
+class _DeterministicTracer:
+    """
+    Traza cada llamada del hilo del event loop con sys.setprofile y acumula el tiempo propio por pila.
+    Las funciones ejecutadas con asyncio.to_thread no se trazan (solo aparece la espera en el loop).
+    """
+
+    def __init__(self):
+        self.stacks = defaultdict(float)
+        self._stack = [()]
+        self._last = 0.0
+
+    def _profile(self, frame, event, arg):
+        now = time.perf_counter()
+        current = self._stack[-1]
+        if current:
+            self.stacks[current] += now - self._last
+        if event == "call":
+            self._stack.append(current + (_frame_label(frame.f_code),))
+        elif event == "c_call":
+            self._stack.append(current + (getattr(arg, "__qualname__", repr(arg)).replace(";", ",") + " (builtin)",))
+        elif len(self._stack) > 1:
+            # return / c_return / c_exception; returns from frames entered before start() are ignored
+            self._stack.pop()
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+        sys.setprofile(self._profile)
+
+    def stop(self):
+        sys.setprofile(None)
+
+
+class _SamplingTracer:
+    """
+    Muestrea desde un hilo aparte las pilas de todos los hilos cada PROFILER_SAMPLE_INTERVAL segundos.
+    Incluye los hilos del executor de asyncio, donde se hacen las llamadas HTTP bloqueantes.
+    """
+
+    def __init__(self, interval=PROFILER_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = defaultdict(float)
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed = now - last
+            last = now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[tuple(reversed(stack))] += elapsed
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cycle-profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class _IOWaitTimer:
+    """
+    Mide el tiempo que el event loop pasa bloqueado en el selector, es decir, esperando I/O o timers.
+    """
+
+    def __init__(self, loop):
+        self.selector = getattr(loop, "_selector", None)
+        self.seconds = 0.0
+
+    def start(self):
+        if self.selector is None:
+            return
+        original = self.selector.select
+
+        def timed_select(timeout=None):
+            started = time.perf_counter()
+            try:
+                return original(timeout)
+            finally:
+                self.seconds += time.perf_counter() - started
+
+        self.selector.select = timed_select
+
+    def stop(self):
+        if self.selector is not None:
+            del self.selector.select # Restore the class method
+
+    def result(self):
+        return round(self.seconds, 6) if self.selector is not None else None
+
+
+class CycleProfiler:
+    """
+    Perfilador opcional de ciclos de búsqueda, armado desde el dashboard.
+
+    El dashboard (otro proceso) deja una petición en PROFILER_DIR con arm_profiler(); al inicio
+    de cada ciclo se consume y se capturan los N ciclos siguientes. Cada captura guarda tiempo de
+    pared vs CPU, espera de I/O del event loop, pilas acumuladas y, opcionalmente, las líneas
+    que más memoria asignan. Se conservan como máximo PROFILER_MAX_CAPTURES capturas.
+
+    Las cifras abarcan todo el event loop durante el ciclo, incluidas otras tareas que corren en
+    él. Para separarlas, el tiempo de las pilas se reparte en `stack_seconds_by_task` según la
+    primera función de `task_functions` que aparezca en cada pila ("other" si ninguna).
+    """
+
+    def __init__(self, directory=PROFILER_DIR, max_captures=PROFILER_MAX_CAPTURES, task_functions=()):
+        self.directory = directory
+        self.max_captures = max_captures
+        self.task_functions = task_functions # Entry points of the tasks sharing the event loop
+        self.request = None
+        self.remaining = 0
+
+    def _poll_request(self):
+        path = os.path.join(self.directory, _REQUEST_FILE)
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path) as f:
+                request = json.load(f)
+            if "id" not in request:
+                raise KeyError("id")
+            _validate_request(request["cycles"], request["mode"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Petición de perfilado inválida: %s", e)
+            request = None
+        finally:
+            # Consume the request even if it is invalid, so it is not re-read every cycle
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        if request is None:
+            return
+        self.request = request
+        self.remaining = request["cycles"]
+        logger.info("Perfilador armado: %s ciclos en modo %s", request["cycles"], request["mode"])
+
+    @contextlib.asynccontextmanager
+    async def cycle(self):
+        self._poll_request()
+        if not self.remaining:
+            yield
+            return
+
+        request = self.request
+        tracer = _DeterministicTracer() if request["mode"] == "deterministic" else _SamplingTracer()
+        io_wait = _IOWaitTimer(asyncio.get_running_loop())
+        trace_allocations = request.get("allocations") and not tracemalloc.is_tracing()
+
+        if trace_allocations:
+            tracemalloc.start()
+        started_at = time.time()
+        wall_start, thread_cpu_start, process_cpu_start = time.perf_counter(), time.thread_time(), time.process_time()
+        io_wait.start()
+        tracer.start()
+        try:
+            yield
+        finally:
+            tracer.stop()
+            io_wait.stop()
+            wall = time.perf_counter() - wall_start
+            thread_cpu = time.thread_time() - thread_cpu_start
+            process_cpu = time.process_time() - process_cpu_start
+            allocations = peak_allocated = None
+            if trace_allocations:
+                # Live allocations at the end of the cycle plus the peak reached during it
+                allocations = _top_allocations(tracemalloc.take_snapshot())
+                peak_allocated = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.remaining -= 1
+
+            capture = {
+                "id": f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))}-{int(started_at * 1000) % 1000:03d}",
+                "request_id": request["id"],
+                "mode": request["mode"],
+                "scope": "event_loop", # Wall, CPU and I/O wait include every task on the loop, not only the scan
+                "started_at": started_at,
+                "wall_seconds": round(wall, 6),
+                "cpu_main_thread_seconds": round(thread_cpu, 6),
+                "cpu_process_seconds": round(process_cpu, 6),
+                "io_wait_seconds": io_wait.result(),
+                "samples": getattr(tracer, "samples", None),
+                "stacks": {";".join(stack): round(seconds, 9) for stack, seconds in tracer.stacks.items()},
+                "stack_seconds_by_task": _split_by_task(tracer.stacks, self.task_functions),
+                "allocations": allocations,
+                "allocated_peak_bytes": peak_allocated,
+            }
+            await asyncio.to_thread(self._save, capture)
+            logger.info("Captura de perfil %s guardada (%.2fs pared, %.2fs CPU)", capture["id"], wall, thread_cpu,
+                        extra={"event": "profile_capture", "capture_id": capture["id"], "mode": capture["mode"]})
+
+    def _save(self, capture):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{capture['id']}.json")
+        with open(path, "w") as f:
+            json.dump(capture, f)
+        for old_id in [entry["id"] for entry in list_captures(self.directory)][self.max_captures:]:
+            os.remove(os.path.join(self.directory, f"{old_id}.json"))
+
+
+def _split_by_task(stacks, task_functions):
+    totals = dict.fromkeys(task_functions, 0.0)
+    totals["other"] = 0.0
+    for stack, seconds in stacks.items():
+        # Outermost matching frame; labels are "name (file:line)"
+        task = next((name for name in (label.split(" (", 1)[0] for label in stack) if name in totals), "other")
+        totals[task] += seconds
+    return {task: round(seconds, 6) for task, seconds in totals.items()}
+
+
+def _top_allocations(snapshot):
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ))
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:_TOP_ALLOCATIONS]
+    ]
+
+
+def _validate_request(cycles, mode):
+    if mode not in PROFILER_MODES:
+        raise ValueError(f"Unknown profiler mode: {mode}")
+    if not isinstance(cycles, int) or isinstance(cycles, bool) or not 1 <= cycles <= PROFILER_MAX_CYCLES:
+        raise ValueError(f"cycles must be an integer between 1 and {PROFILER_MAX_CYCLES}")
+
+
+def arm_profiler(cycles, mode, allocations=False, directory=PROFILER_DIR):
+    """
+    Solicita al escáner que perfile sus próximos `cycles` ciclos. Lo usa el dashboard.
+
+    Returns:
+        dict: La petición registrada.
+
+    Raises:
+        ValueError: Si el modo no existe o el número de ciclos está fuera de rango.
+    """
+    _validate_request(cycles, mode)
+    request = {"id": f"{int(time.time() * 1000)}", "cycles": cycles, "mode": mode, "allocations": bool(allocations)}
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _REQUEST_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(request, f)
+    os.replace(path + ".tmp", path) # Atomic: the scanner never reads a half-written request
+    return request
+
+
+def list_captures(directory=PROFILER_DIR):
+    """
+    Devuelve los metadatos de las capturas guardadas, de la más reciente a la más antigua.
+    """
+    if not os.path.isdir(directory):
+        return []
+    captures = []
+    for name in os.listdir(directory):
+        if not name.endswith(".json") or name == _REQUEST_FILE:
+            continue
+        capture = load_capture(name[:-len(".json")], directory)
+        if capture:
+            capture.pop("stacks", None)
+            capture.pop("allocations", None)
+            captures.append(capture)
+    return sorted(captures, key=lambda capture: capture["started_at"], reverse=True)
+
+
+def load_capture(capture_id, directory=PROFILER_DIR):
+    if not _CAPTURE_ID.match(capture_id):
+        return None
+    try:
+        with open(os.path.join(directory, f"{capture_id}.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def to_collapsed(capture):
+    """
+    Exporta las pilas en formato "collapsed" (flamegraph.pl, inferno), con pesos en microsegundos.
+    """
+    lines = []
+    for stack, seconds in sorted(capture["stacks"].items()):
+        weight = int(seconds * 1_000_000)
+        if weight:
+            lines.append(f"{stack} {weight}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(capture):
+    """
+    Exporta las pilas como un perfil "sampled" de speedscope (una muestra por pila única).
+    """
+    frames = []
+    frame_index = {}
+    samples = []
+    weights = []
+    for stack, seconds in capture["stacks"].items():
+        sample = []
+        for name in stack.split(";"):
+            if name not in frame_index:
+                frame_index[name] = len(frames)
+                frames.append({"name": name})
+            sample.append(frame_index[name])
+        samples.append(sample)
+        weights.append(seconds)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "exporter": "arbitrage_info_bot",
+        "name": f"cycle {capture['id']} ({capture['mode']})",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": f"cycle {capture['id']}",
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        }],
+    }
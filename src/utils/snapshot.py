@@ -0,0 +1,181 @@
+
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from config.settings import OPPORTUNITY_SNAPSHOT_FILE, OPPORTUNITY_SNAPSHOT_CAPACITY_BYTES
+from src.utils.helpers import to_human_readable, oldest_input_time
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Cabecera del snapshot (little-endian):
+#   magic (4s) | layout (I) | seq (Q) | generation (Q) | published_at (d) | length (I)
+# `seq` funciona como seqlock: es impar mientras el escritor está copiando el payload.
+_HEADER = struct.Struct("<4sIQQdI")
+_SEQ = struct.Struct("<Q")
+_MAGIC = b"ARBS"
+_LAYOUT_VERSION = 1
+_SEQ_OFFSET = 8
+_HEADER_SIZE = 64
+_EMPTY_PAYLOAD = b"[]"
+_MAX_READ_RETRIES = 100
+
+
+def format_opportunity(opp):
+    """
+    Prepara una oportunidad para el dashboard (ganancia y fecha legibles).
+    """
+    formatted_opp = opp.copy()
+
+    # Determine the base token symbol and its decimals for display
+    base_token_symbol = opp['capital'].split(' ')[1] # e.g., '0.1 SOL' -> 'SOL'
+
+    # This is a simplification. In a real scenario, you'd need to fetch decimals for any token.
+    # For now, rely on the base tokens defined in settings.
+    base_token_decimals = 9 if base_token_symbol == "SOL" else (6 if base_token_symbol == "USDC" else 0)
+
+    if 'net_profit_lamports' in formatted_opp:
+        formatted_opp['net_profit_display'] = f"{to_human_readable(formatted_opp['net_profit_lamports'], base_token_decimals):.6f} {base_token_symbol}"
+
+    # Format timestamp for display
+    if 'timestamp' in formatted_opp and isinstance(formatted_opp['timestamp'], int):
+        formatted_opp['timestamp_display'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(formatted_opp['timestamp']))
+    else:
+        formatted_opp['timestamp_display'] = 'N/A'
+
+    # Freshness: age of the oldest input (pool state / quote) and observed lifetime so far
+    now = time.time()
+    formatted_opp['input_age_seconds'] = round(now - oldest_input_time(opp), 1)
+    if 'first_seen' in formatted_opp:
+        formatted_opp['lifetime_seconds'] = round(now - formatted_opp['first_seen'], 1)
+
+    return formatted_opp
+
+
+class OpportunitySnapshotWriter:
+    """
+    Publica cada generación de oportunidades, ya serializada a JSON, en un archivo mapeado en memoria.
+    Lo usa únicamente el proceso del escáner; el dashboard lo lee con OpportunitySnapshotReader.
+    """
+
+    def __init__(self, path=OPPORTUNITY_SNAPSHOT_FILE, capacity=OPPORTUNITY_SNAPSHOT_CAPACITY_BYTES):
+        self.path = path
+        self.capacity = capacity
+        size = _HEADER_SIZE + capacity
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # No se trunca nunca hacia abajo: un lector con el mapeo abierto recibiría SIGBUS.
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.mm = mmap.mmap(fd, size, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        magic, layout, seq, generation, _, _ = _HEADER.unpack_from(self.mm, 0)
+        if magic == _MAGIC and layout == _LAYOUT_VERSION:
+            # Continuar la secuencia de un escáner anterior para que los lectores detecten el cambio.
+            self.seq = seq + (seq & 1)
+            self.generation = generation
+        else:
+            self.seq = 0
+            self.generation = 0
+        self._write(_EMPTY_PAYLOAD)
+
+    def publish(self, opportunities):
+        """
+        Serializa y publica una generación de oportunidades.
+
+        Returns:
+            int: Número de generación publicado, None si el payload no cabe en el snapshot.
+        """
+        payload = json.dumps([format_opportunity(opp) for opp in opportunities], ensure_ascii=False).encode("utf-8")
+        if len(payload) > self.capacity:
+            logger.error("Snapshot de oportunidades demasiado grande (%s bytes, capacidad %s). No se publica.",
+                         len(payload), self.capacity)
+            return None
+        self._write(payload)
+        return self.generation
+
+    def _write(self, payload):
+        self.seq += 1
+        _SEQ.pack_into(self.mm, _SEQ_OFFSET, self.seq)
+        self.mm[_HEADER_SIZE:_HEADER_SIZE + len(payload)] = payload
+        self.generation += 1
+        # La cabecera se escribe con `seq` todavía impar; el `seq` par se publica al final.
+        _HEADER.pack_into(self.mm, 0, _MAGIC, _LAYOUT_VERSION, self.seq, self.generation, time.time(), len(payload))
+        self.seq += 1
+        _SEQ.pack_into(self.mm, _SEQ_OFFSET, self.seq)
+
+    def close(self):
+        self.mm.close()
+
+
+class OpportunitySnapshotReader:
+    """
+    Mapea el snapshot en solo lectura y devuelve el último payload consistente.
+    Si el snapshot no ha cambiado desde la última lectura, devuelve los bytes en caché sin copiar.
+    """
+
+    def __init__(self, path=OPPORTUNITY_SNAPSHOT_FILE):
+        self.path = path
+        self.mm = None
+        self._lock = threading.Lock() # The server may call read() from several threads
+        # (seq, snapshot) en una sola tupla para que los hilos del servidor la vean siempre coherente
+        self._cached = (None, (0, 0.0, _EMPTY_PAYLOAD))
+
+    def _open(self):
+        # Se llama con self._lock tomado: ningún otro hilo está leyendo del mapeo anterior
+        if self.mm is not None:
+            self.mm.close()
+        try:
+            with open(self.path, "rb") as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # El escáner todavía no ha creado el snapshot (o está vacío).
+            self.mm = None
+        return self.mm
+
+    def read(self):
+        """
+        Returns:
+            tuple: (generation, published_at, payload_bytes). Generación 0 si aún no hay snapshot.
+        """
+        with self._lock:
+            return self._read()
+
+    def _read(self):
+        cached_seq, cached_snapshot = self._cached
+        if self.mm is None and self._open() is None:
+            return cached_snapshot
+
+        for _ in range(_MAX_READ_RETRIES):
+            seq_before, = _SEQ.unpack_from(self.mm, _SEQ_OFFSET)
+            if seq_before & 1:
+                continue # Escritura en curso
+            if seq_before == cached_seq:
+                return cached_snapshot
+            magic, layout, _, generation, published_at, length = _HEADER.unpack_from(self.mm, 0)
+            if magic != _MAGIC or layout != _LAYOUT_VERSION:
+                continue
+            if _HEADER_SIZE + length > len(self.mm):
+                # El escáner se reinició con más capacidad; volver a mapear el archivo.
+                if self._open() is None:
+                    return cached_snapshot
+                continue
+            payload = self.mm[_HEADER_SIZE:_HEADER_SIZE + length]
+            seq_after, = _SEQ.unpack_from(self.mm, _SEQ_OFFSET)
+            if seq_before == seq_after:
+                snapshot = (generation, published_at, payload)
+                self._cached = (seq_before, snapshot)
+                return snapshot
+
+        logger.warning("No se pudo leer un snapshot consistente; se sirve la última versión conocida.")
+        return cached_snapshot